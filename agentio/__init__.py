@@ -41,7 +41,7 @@ def _handleCommand(message):
     message = { data: { command: 'foo', args: { ... } }, pump: ... }
     '''
 
-    _controller._logger.debug(f"leap has command '{message}'")
+    _controller._logger.debug("leap has command '%s'", message)
     handled = False
     try:
         command_name = message['data']['command']
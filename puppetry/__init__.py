@@ -365,7 +365,7 @@ def _handleCommand(message):
         log
         ...
     '''
-    _logger.debug(f"leap has command '{message}'")
+    _logger.debug("leap has command '%s'", message)
     handled = False
     try:
         command_name = message['data']['command']
@@ -379,9 +379,8 @@ def _handleCommand(message):
                 except Exception as e:
                     _logger.info(f"failed command='{command_name}' err='{e}'")
         except:
-            _logger.debug(f"unknown command='{command_name}'")
-            known_commands = _commandRegistry.keys()
-            _logger.debug(f"known command are {known_commands}")
+            _logger.debug("unknown command='%s'", command_name)
+            _logger.debug("known command are %s", _commandRegistry.keys())
     except:
         _logger.info(f"failed command message='{message}'")
     return handled
@@ -422,7 +421,7 @@ def _spin():
                 break
             else:
                 # skip all other messages
-                _logger.debug(f"skip bad response='{response}'")
+                _logger.debug("skip bad response='%s'", response)
                 pass
 
         # finally spin on stdin and handle inbound commands/messages
@@ -135,10 +135,6 @@ puppetry.start()
 # spin the animation
 spinner = eventlet.spawn(spin)
 
-# loop the UI until puppetry is stopped
-while puppetry.isRunning():
-    eventlet.sleep(0.2)
-
-# cleanup
+# the coroutine exits once puppetry is stopped
 spinner.wait()
 
@@ -44,7 +44,7 @@ class Expression:
         #puppetry.sendPuppetryData(dict(command='send_skeleton'))    #Request skeleton
         puppetry.sendGet('skeleton')    #Request skeleton
         retries = 3
-        end_time = time.time() + 2.0
+        end_time = time.monotonic() + 2.0
 
         while puppetry.isRunning() and retries > 0:
             if puppetry.get_skeleton_data('scale') is not None:
@@ -53,7 +53,7 @@ class Expression:
 
             eventlet.sleep(0.1) #Sleep 1/10th of a second
 
-            cur_time = time.time()
+            cur_time = time.monotonic()
             if cur_time > end_time:
                 retries = retries - 1
                 end_time = cur_time + 3.0
@@ -78,7 +78,7 @@ class Expression:
         eventlet.sleep(UPDATE_PERIOD)
 
         while puppetry.isRunning():
-            frame_start_time = time.time()
+            frame_start_time = time.monotonic()
 
             #Build some crude animation to see we're doing stuff.
             delta = (counter % 10)
@@ -106,7 +106,7 @@ class Expression:
             puppetry.sendSet(data)
             counter += 1
 
-            cur_time = time.time()
+            cur_time = time.monotonic()
             frame_compute_time = cur_time - frame_start_time
             nap_duration = max(0.0, UPDATE_PERIOD - frame_compute_time)
             eventlet.sleep(nap_duration)
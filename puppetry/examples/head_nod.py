@@ -127,8 +127,7 @@ def puppetry_coroutine():
 
 # start the real work
 puppetry.start()
-eventlet.spawn(puppetry_coroutine)
+spinner = eventlet.spawn(puppetry_coroutine)
 
-# loop until puppetry stops
-while puppetry.isRunning():
-    eventlet.sleep(0.2)
+# the coroutine exits once puppetry is stopped
+spinner.wait()
@@ -174,8 +174,5 @@ def puppetry_coroutine():
 puppetry.start()
 spinner = eventlet.spawn(puppetry_coroutine)
 
-while puppetry.isRunning():
-    eventlet.sleep(0.2)
-
-# cleanup
+# the coroutine exits once puppetry is stopped
 spinner.wait()
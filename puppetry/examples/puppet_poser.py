@@ -149,8 +149,5 @@ puppetry.setLogLevel(logging.DEBUG)
 puppetry.start()
 spinner = eventlet.spawn(puppetry_coroutine)
 
-while puppetry.isRunning():
-    eventlet.sleep(0.2)
-
-# cleanup
+# the coroutine exits once puppetry is stopped
 spinner.wait()
@@ -172,12 +172,7 @@ def main():
     # spin the animation playback
     spinner = eventlet.spawn(main_loop)
 
-    # loop the UI until puppetry is stopped
-    while puppetry.isRunning():
-        # do nothing while the coroutines have all the fun
-        eventlet.sleep(0.1)
-
-    # cleanup
+    # main_loop exits once puppetry is stopped
     spinner.wait()
     puppetry.stop()
 
@@ -1,6 +1,10 @@
 import cv2
 import numpy as np
 
+#Shared by every Camera; we just pretend the camera has no distortion.
+NO_DISTORTION = np.zeros((4,1))
+NO_DISTORTION.flags.writeable = False
+
 
 class Camera:
     '''A utility class to manage the camera and captured images'''
@@ -11,9 +15,9 @@ class Camera:
         self.downsample = None      #Use [x,y] to downsample
         self.bgr_image = None       #Image in Blue Green Red order
         self.rgb_image = None       #Image in Red Green Blue order
-        self.size = [0,0]           #Contains captured image dimensions
+        self.size = (0,0)           #Captured image dimensions, set by configure_camera
         self.matrix = None          #Details about the camera
-        self.dist_coeff = None      #Distortion coefficients
+        self.dist_coeffs = None     #Distortion coefficients
 
 
     def configure_camera(self):
@@ -33,7 +37,10 @@ class Camera:
                                     self.downsample[0])
             self.device.set(cv2.CAP_PROP_FRAME_HEIGHT, \
                                     self.downsample[1])
-        self.get_rgb_frame()    #Get a frame to finish init.
+        if self.get_rgb_frame():    #Get a frame to finish init.
+            #Capture dimensions don't change once the device is configured.
+            height, width, _ = self.bgr_image.shape
+            self.size = (width, height)
 
         # Camera internals
         focal_length = self.size[0]
@@ -43,8 +50,7 @@ class Camera:
                                  [0, 0, 1]],
                                  dtype = "double" )
 
-        #Just pretend the camera has no distortion.
-        self.dist_coeffs = np.zeros((4,1))
+        self.dist_coeffs = NO_DISTORTION
 
     def get_rgb_frame(self):
         '''Captures a frame from the camera, converts it to rgb
@@ -55,8 +61,10 @@ class Camera:
         if not ret:
             return False
 
-        self.size[1], self.size[0], _ = self.bgr_image.shape
-        self.rgb_image = cv2.cvtColor(self.bgr_image, cv2.COLOR_BGR2RGB)
+        #Convert into the previous frame's buffer; cvtColor only
+        #allocates when the size changes.
+        self.rgb_image = cv2.cvtColor(self.bgr_image, cv2.COLOR_BGR2RGB, \
+                                      dst=self.rgb_image)
 
         return True
 
@@ -28,6 +28,19 @@ DARK_GRAY = (64,64,64)
 BLACK = (0,0,0)
 
 WINDOW_NAME = "Image"
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+FPS_ORIGIN = (20, 70)       #Where the FPS counter is drawn
+FPS_SMOOTHING = 0.1         #Weight of the newest frame in the FPS average
+
+def dot_offsets(radius):
+    '''Returns the (x,y) pixel offsets covering a filled dot of radius'''
+    span = np.arange(-radius, radius + 1)
+    dx, dy = np.meshgrid(span, span)
+    inside = (dx * dx + dy * dy) <= radius * radius
+    return np.stack((dx[inside], dy[inside]), axis=1)
+
+#Offsets for the dot sizes we draw, keyed by radius.
+DOT_OFFSETS = { 1: dot_offsets(1), 2: dot_offsets(2) }
 
 class Display:
     '''
@@ -38,13 +51,19 @@ class Display:
     def __init__(self):
         self.display = True         #Master control
         self.dimensions = None #[ 640, 400 ] #Target window size. None is full
+        self.interpolation = None   #cv2.INTER_* for resizing to dimensions. None picks by scale
         self.display_video = True   #Display what the camera sees
         self.display_face_pts = True #Show points on the face.
         self.display_fps      = True #Show the estimated FPS of tracking
         self.mirror = False          #Flip display horizontally
         self.size = None            #The actual display size, set per frame
         self.image = None           #The image to display.
+        self.scaled_image = None    #Reused destination when resizing to dimensions
+        self.mirror_image = None    #Reused destination when mirroring
+        self.blank_image = None     #Reused background when not showing video
         self.aspect_ratio = None
+        self.fps = None             #Smoothed FPS estimate
+        self.nose_end = np.zeros((1,3)) #3D end of the perpendicular, reused per frame
         try:
             cv2.namedWindow(WINDOW_NAME)  # Create a window.   This is initially blank, but shows the user something is going on
         except cv2.error as excp:
@@ -70,30 +89,41 @@ class Display:
                 self.image = bgr_image
             else:
                 dim = (self.size[0], self.size[1])
+                interpolation = self.interpolation
+                if interpolation is None:
+                    #Area averaging looks best shrinking, linear enlarging.
+                    height, width, _ = bgr_image.shape
+                    if dim[0] * dim[1] < width * height:
+                        interpolation = cv2.INTER_AREA
+                    else:
+                        interpolation = cv2.INTER_LINEAR
                 try:
-                    self.image = cv2.resize(bgr_image, dim, \
-                                interpolation = cv2.INTER_NEAREST)
+                    #Resize into the buffer from the last frame rather than
+                    #allocating a new image every frame.
+                    self.scaled_image = cv2.resize(bgr_image, dim, \
+                                dst = self.scaled_image, \
+                                interpolation = interpolation)
+                    self.image = self.scaled_image
                 except cv2.error as excp:
                     puppetry.log("cv2 exception resizing image: %s" % str(excp))
 
         else:
             color = BLACK
-            self.image = np.full((self.size[1], self.size[0], 3), \
-                    color, dtype=np.uint8)
+            shape = (self.size[1], self.size[0], 3)
+            if self.blank_image is None or self.blank_image.shape != shape:
+                self.blank_image = np.full(shape, color, dtype=np.uint8)
+            else:
+                self.blank_image[:] = color     #Clear last frame's drawing
+            self.image = self.blank_image
 
     def label_point(self, id, location):
         '''Print point labels'''
-        font = cv2.FONT_HERSHEY_SIMPLEX
         location = (50, 50)
 
-        fontScale = 0.25 # fontScale
-        color = GREEN
-        thickness = 2 # Line thickness of 2 px
-
-        # Using cv2.putText() method
+        # Using cv2.putText() method, 0.25 scale and 2px thick.
         try:
-            cv2.putText(self.image, str(id), location, font,
-                               fontScale, color, thickness, cv2.LINE_AA)
+            cv2.putText(self.image, str(id), location, FONT,
+                               0.25, GREEN, 2, cv2.LINE_AA)
         except cv2.error as excp:
             puppetry.log("cv2 exception drawing text: %s" % str(excp))
 
@@ -103,77 +133,73 @@ class Display:
         if not self.display:
             return 0
 
-        if landmarks is None:
+        if landmarks is None or not self.has_image():
             return 0
 
         #Draw the points on the face
-        i=0
-        landmark = None
-        location = None
-        try:
-            for landmark in landmarks.landmark:
-                location = ( int(landmark.x * self.size[0]), \
-                             int(landmark.y * self.size[1]) )
-
-                cv2.circle(self.image, location, 2, color, -1)
-                i += 1
-        except OverflowError as excp:
-            puppetry.log("OverflowError exception drawing landmark point: %d" % (str(excp), i))
-            return 0
-        except TypeError as excp:
-            puppetry.log("TypeError %s drawing landmark point: %d location %r" % (str(excp), i, location))
-            return 0
-        except ValueError as excp:
-            puppetry.log("ValueError exception %s drawing landmark point: %d" % (str(excp), i))
-            return 0
-        except cv2.error as excp:
-            puppetry.log("cv2 exception %s drawing landmark point: %d location %r" % (str(excp), i, location))
+        #Scale all of the landmarks to pixels at once.
+        locations = np.array([ (landmark.x, landmark.y) \
+                               for landmark in landmarks.landmark ])
+        if len(locations) == 0:
             return 0
+        locations = (locations * self.size).astype(int)
+
+        self.draw_dots(locations, 2, color)
         # Successful
-        return i
+        return len(locations)
 
-    def draw_all_points(self, points, orientation_landmarks=None, rect_landmarks=None):
-        '''Display the points for this landmark set.'''
+    def draw_all_points(self, points, orientation_mask=None, rect_mask=None):
+        '''Display the points for this landmark set.
+           The optional boolean masks select the points drawn as
+           orientation (yellow) and rect (red) landmarks.'''
 
         if not self.display_face_pts or \
-           not self.display:
+           not self.display or \
+           not self.has_image():
             return 0
 
         #Draw the points on the face
-        i=0
-        point = None
-        location = None
-        try:
-            for point in points:
-                location = ( int(point[0] * self.size[0]), \
-                             int(point[1] * self.size[1]) )
-
-                #self.label_point( i, location)
-                color = CYAN
-
-                if orientation_landmarks is not None:
-                    if i in orientation_landmarks:
-                        color = YELLOW
-                    elif i in rect_landmarks:
-                        color = RED
-
-                cv2.circle(self.image, location, 1, color, -1)
-                i += 1
-        except OverflowError as excp:
-            puppetry.log("OverflowError exception drawing landmark points: %s" % (str(excp), point))
-            return 0
-        except TypeError as excp:
-            puppetry.log("TypeError %s drawing landmark point: %r location %r size %r" % (str(excp), point, location))
-            return 0
-        except ValueError as excp:
-            puppetry.log("ValueError exception %s drawing landmark point: %r" % (str(excp), point))
-            return 0
-        except cv2.error as excp:
-            puppetry.log("cv2 exception %s drawing landmark point: %r location %r" % (str(excp), point, location))
-            return 0
+        #Scale all of the points to pixels at once.
+        locations = np.asarray(points)[:, :2] * self.size
+        locations = locations.astype(int)
+
+        if orientation_mask is None:
+            self.draw_dots(locations, 1, CYAN)
+        else:
+            #Draw each color group in one pass.
+            plain = ~orientation_mask
+            if rect_mask is not None:
+                plain &= ~rect_mask
+            self.draw_dots(locations[plain], 1, CYAN)
+            if rect_mask is not None:
+                self.draw_dots(locations[rect_mask], 1, RED)
+            self.draw_dots(locations[orientation_mask], 1, YELLOW)
         # Successful
-        return i
+        return len(locations)
+
+    def has_image(self):
+        '''True if there is a sized image to draw on.'''
+        return self.image is not None and \
+               self.size is not None and \
+               self.size[0] > 0 and self.size[1] > 0
+
+    def draw_dots(self, locations, radius, color):
+        '''Draw a filled dot at each of the (N,2) pixel locations.
+           Small dots are cheaper to write straight into the image than
+           to draw one at a time with cv2.circle.'''
 
+        if radius not in DOT_OFFSETS:
+            DOT_OFFSETS[radius] = dot_offsets(radius)
+
+        pixels = (locations[:, None, :] + DOT_OFFSETS[radius]).reshape(-1, 2)
+
+        #Skip any pixels that fall outside the image.
+        height, width = self.image.shape[:2]
+        inside = (pixels[:, 0] >= 0) & (pixels[:, 0] < width) & \
+                 (pixels[:, 1] >= 0) & (pixels[:, 1] < height)
+        pixels = pixels[inside]
+
+        self.image[pixels[:, 1], pixels[:, 0]] = color
 
     def draw_perpendicular(self, point, rotation, position, camera):
         '''Draws a line perpendicular to a point'''
@@ -186,8 +212,9 @@ class Display:
         # We use this to draw a line sticking out of the nose
         try:
             pinocchio = 0.1 * self.size[0]
+            self.nose_end[0, 2] = pinocchio
             (nose_end_point2D, _) = cv2.projectPoints( \
-                                    np.array([(0.0, 0.0, pinocchio)]), \
+                                    self.nose_end, \
                                     rotation, \
                                     position, \
                                     camera.matrix, \
@@ -207,30 +234,35 @@ class Display:
     def erase_image(self):
         ''' clear the display '''
 
-        try:
-            color = DARK_GRAY
-            erase_size = (640,480)
-            if self.size is not None:
-                erase_size = (self.size[0], self.size[1])
-            puppetry.log("erase rect %r %r" % erase_size)
-            cv2.rectangle(self.image, (0,0), erase_size, color, -1)
-        except cv2.error as excp:
+        if self.image is None:
             # just log it, doesn't have to be fatal
-            puppetry.log("cv2 exception %s" % str(excp))
+            puppetry.log("no image to erase")
+            return
+
+        color = DARK_GRAY
+        puppetry.log("erase image %r" % (self.image.shape[:2],))
+        self.image[:] = color
 
     def do_display(self, start_time):
         '''Display the frame'''
         if self.display:
             try:
                 if self.mirror:
-                    self.image = cv2.flip(self.image, 1)
+                    self.mirror_image = cv2.flip(self.image, 1, \
+                                                 dst = self.mirror_image)
+                    self.image = self.mirror_image
 
-                if self.display_fps:
+                if self.display_fps and self.image is not None:
                     # can get a div-by-zero error here if there's no image
-                    display_duration = max(0.001, time.time() - start_time)
+                    display_duration = max(0.001, time.monotonic() - start_time)
                     fps = 1 / display_duration
-                    cv2.putText(self.image, f'FPS:{int(fps)}', (20, 70), \
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, GREEN, 2)
+                    #Average over recent frames so the counter is readable.
+                    if self.fps is None:
+                        self.fps = fps
+                    else:
+                        self.fps += FPS_SMOOTHING * (fps - self.fps)
+                    cv2.putText(self.image, f'FPS:{int(self.fps)}', FPS_ORIGIN, \
+                        FONT, 1, GREEN, 2)
 
                 x=0
                 y=0
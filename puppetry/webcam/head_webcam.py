@@ -28,13 +28,17 @@ uncomment the print("") line in the main loop below.
 """
 
 
+import queue
+import sys
+import threading
 import time
+import traceback
 
 import cv2
 import eventlet
 import face_recognition
 import numpy as np
-from PIL import Image, ImageDraw
+from camera import NO_DISTORTION
 
 import puppetry
 
@@ -42,9 +46,27 @@ CAMERA_DIMENSIONS = [ 320, 240 ]
 UPDATE_PERIOD = 0.1     # time between puppetry updates
 
 MIRROR = True   #Make what is left right and what is right all that is left
+QUEUE_DEPTH = 1 #Only the newest item waits between pipeline stages
+MAX_FAILED_READS = 100  #Consecutive failed camera reads before giving up
+DETECT_WIDTH = 320  #Wider frames are scaled down to this for face detection
+HEAD_SMOOTHING = 0.4    #Weight of the newest pose in the head rotation average
 
 DISPLAY_VIDEO = True    #Do we want to see what the agent is doing?
 DISPLAY_FACE_TRACK = True    #Face tracking lines on the video?
+NOSE_END = np.array([(0.0, 0.0, 1000.0)])   #Model point the nose line is drawn to
+
+def put_newest(q, item):
+    '''Put item on a bounded queue, dropping the oldest entry if it is full'''
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+
 class Expression:
     '''
     A class for using realtime data from the webcam to animate SecondLife Avatars
@@ -55,8 +77,8 @@ class Expression:
         self.capture_id = 0         #Which camer we're using.
         self.face_rot_vec   = None  #The rotation of the face in the frame
         self.face_pos_vec   = None  #Translation of the face from center
-        self.camera_matrix  = None
-        self.dist_coeff     = None
+        self.camera_matrix  = None  #Camera internals, set from the first frame
+        self.dist_coeffs    = None
         self.model_points = np.array([               # 3D model points.
                                 (0.0, 0.0, 0.0),             # Nose tip
                                 (0.0, -330.0, -65.0),        # Chin
@@ -65,28 +87,26 @@ class Expression:
                                 (-150.0, -150.0, -125.0),    # Left Mouth corner
                                 (150.0, -150.0, -125.0)      # Right mouth corner
                             ])
-        self.head_buf = []      #Buffer the head a few frames so it doesn't jerk as much
+        self.head_rot_vec = None    #Averaged face rotation so the head doesn't jerk as much
+        self.frames = queue.Queue(maxsize=QUEUE_DEPTH)      #Captured BGR frames
+        self.detections = queue.Queue(maxsize=QUEUE_DEPTH)  #Frames with their face pose
+        self.stopping = threading.Event()   #Tells the pipeline threads to exit
+        self.rgb_frame = None   #Detection thread's reused RGB conversion buffer
+        self.last_rot_vec = None    #Last solved pose, the next solve's starting guess
+        self.last_pos_vec = None
 
 
     def getFrame( self ):
         '''
-            Gets a frame from the camera and scales it by scale_factor
-            The scale factor is for tuning and optimization.  A smaller
-            frame will find faces more quickly but with less accuracy
-            Converts frame from BGR to RGB
-            returns the scaled RGB frame
+            Gets a frame from the camera
+            returns the BGR frame as captured, or None if the read failed
         '''
 
         # Grab a single frame of video
         ret_code, bgr_frame = self.capture_device.read()
 
-        #TODO look at ret_code
-
-        # Convert the image from BGR color (CV output) to RGB display and face track.
-        # NOTE: BGR and inverting palette may improve tracking quality for dark skin tones
-
-        if MIRROR:
-            bgr_frame = cv2.flip(bgr_frame, 1)
+        if not ret_code:
+            return None
 
         return bgr_frame
 
@@ -126,21 +146,17 @@ class Expression:
         display_image = frame
 
         if DISPLAY_FACE_TRACK:
-            # Create a PIL imagedraw object so we can draw on the picture
-            pil_image = Image.fromarray(frame)
-            d = ImageDraw.Draw(pil_image)
-
             # Project a 3D point (0, 0, 1000.0) onto the image plane.
             # We use this to draw a line sticking out of the nose
 
-            (nose_end_point2D, jacobian) = cv2.projectPoints(np.array([(0.0, 0.0, 1000.0)]), \
+            (nose_end_point2D, jacobian) = cv2.projectPoints(NOSE_END, \
                     self.face_rot_vec, self.face_pos_vec, self.camera_matrix, self.dist_coeffs)
 
             # Let's trace out each facial feature in the image with a line!
+            # Drawn straight onto the frame; it isn't used after display.
             for facial_feature in face_landmarks.keys():
-                d.line(face_landmarks[facial_feature], width=3)
-
-            display_image = np.array(pil_image)
+                points = np.asarray(face_landmarks[facial_feature], dtype=np.int32)
+                cv2.polylines(display_image, [points], False, (255,255,255), 3)
 
             for p in image_points:
                 cv2.circle(display_image, (int(p[0]), int(p[1])), 3, (0,0,255), -1)
@@ -173,9 +189,9 @@ class Expression:
         #print ("Rotation Vector:\n {0}".format(self.face_rot_vec))
         #print ("Translation Vector:\n {0}".format(self.face_pos_vec))
 
-        yaw = float(self.face_rot_vec[1][0] * 1.0)
-        pitch = float(self.face_rot_vec[0][0] + 3.2)
-        roll = float(self.face_rot_vec[2][0] * -1.0)
+        yaw = float(self.head_rot_vec[1][0] * 1.0)
+        pitch = float(self.head_rot_vec[0][0] + 3.2)
+        roll = float(self.head_rot_vec[2][0] * -1.0)
         packed_quaternion = puppetry.packedQuaternionFromEulerAngles(yaw, pitch, roll)
         data = {"mHead": {"rotation": packed_quaternion}}
 
@@ -186,29 +202,94 @@ class Expression:
 
         return data
 
-    def main_loop( self ):
+    def init_intrinsics( self, img_size ):
         '''
-        Main loop
+            Build the camera matrix for frames of img_size.
+            The capture size doesn't change once the device is set up.
         '''
-        print("Initializing")
-        # Get a reference to webcam #0 (the default one)
-        self.capture_device = cv2.VideoCapture( self.capture_id )
-        self.capture_device.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_DIMENSIONS[0])
-        self.capture_device.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_DIMENSIONS[1])
+        focal_length = img_size[1]
+        center = (img_size[1]/2, img_size[0]/2)
+        self.camera_matrix = np.array(
+                                 [[focal_length, 0, center[0]],
+                                 [0, focal_length, center[1]],
+                                 [0, 0, 1]], dtype = "double"
+                                 )
 
-        time.sleep(1.0)
+        self.dist_coeffs = NO_DISTORTION # Assuming no lens distortion
 
-        while True:
-            t0 = time.monotonic()
-            bgr_frame =  self.getFrame( )
-            rgb_frame = cv2.cvtColor(bgr_frame, cv2.COLOR_BGR2RGB)
+    def run_worker( self, loop ):
+        '''
+        Runs a pipeline loop, logging whatever ends it.  main_loop stops
+        once any worker has exited.
+        '''
+        try:
+            loop()
+        except Exception as excp:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            puppetry.log("stacktrace: %r" % traceback.format_tb(exc_traceback))
+            puppetry.log("%s failed: %r" % (loop.__name__, str(excp)))
+
+    def capture_loop( self ):
+        '''
+        Pipeline thread: keeps the newest camera frame queued for detection
+        '''
+        failed_reads = 0
+        while not self.stopping.is_set():
+            bgr_frame = self.getFrame( )
+            if bgr_frame is None:
+                failed_reads += 1
+                if failed_reads >= MAX_FAILED_READS:
+                    puppetry.log("Camera %r stopped returning frames" % self.capture_id)
+                    return
+                time.sleep(0.01)    #Camera not ready, don't spin
+                continue
+            failed_reads = 0
+            put_newest(self.frames, bgr_frame)
 
-            img_size = rgb_frame.shape
+    def detect_loop( self ):
+        '''
+        Pipeline thread: finds the face and its pose in the newest frame
+        '''
+        while not self.stopping.is_set():
+            try:
+                bgr_frame = self.frames.get(timeout=0.1)
+            except queue.Empty:
+                continue
 
-            face_landmarks = self.find_facial_landmarks( rgb_frame )
+            #Mirror only the frames we process; dropped frames are never
+            #flipped.  The flipped frame is also the one displayed, so it is
+            #flipped at full size.
+            if MIRROR:
+                bgr_frame = cv2.flip(bgr_frame, 1)
+
+            img_size = bgr_frame.shape
+
+            #Detection cost grows with pixel count, so find the face in a
+            #smaller copy of large frames.  Shrink before converting so
+            #there's less to convert.
+            detect_frame = bgr_frame
+            scale = 1.0
+            if img_size[1] > DETECT_WIDTH:
+                scale = DETECT_WIDTH / img_size[1]
+                detect_frame = cv2.resize(bgr_frame, (0,0), fx=scale, fy=scale, \
+                                          interpolation=cv2.INTER_LINEAR)
+
+            # Convert the image from BGR color (CV output) to RGB to face track,
+            # reusing this thread's rgb_frame buffer from the last pass.
+            # NOTE: BGR and inverting palette may improve tracking quality for dark skin tones
+            self.rgb_frame = cv2.cvtColor(detect_frame, cv2.COLOR_BGR2RGB, \
+                                          dst=self.rgb_frame)
+
+            face_landmarks = self.find_facial_landmarks( self.rgb_frame )
             if face_landmarks is None:
                 continue
 
+            if scale != 1.0:
+                #Put the landmarks back in the captured frame's pixels.
+                face_landmarks = { feature : [ (round(x / scale), round(y / scale)) \
+                                               for x, y in points ] \
+                                   for feature, points in face_landmarks.items() }
+
             image_points = np.array([ face_landmarks['nose_bridge'][-1],
                                          face_landmarks['chin'][8],
                                          face_landmarks['left_eye'][0],
@@ -216,41 +297,111 @@ class Expression:
                                          face_landmarks['top_lip'][0],
                                          face_landmarks['top_lip'][6]
                                         ], dtype="double")
-            # Camera internals
-            focal_length = img_size[1]
-            center = (img_size[1]/2, img_size[0]/2)
-            self.camera_matrix = np.array(
-                                     [[focal_length, 0, center[0]],
-                                     [0, focal_length, center[1]],
-                                     [0, 0, 1]], dtype = "double"
-                                     )
-
-            self.dist_coeffs = np.zeros((4,1)) # Assuming no lens distortion
+            if self.camera_matrix is None:
+                self.init_intrinsics( img_size )
 
             #Find the translation and rotation of the face.
             #translation becomes the effector position for the head.
             #rotation the rotation of the head.
-            (success, self.face_rot_vec, self.face_pos_vec) = \
+            #The head moves little between frames, so start from the last
+            #pose; the solver then converges in a couple of iterations.
+            if self.last_rot_vec is None:
+                (success, face_rot_vec, face_pos_vec) = \
                         cv2.solvePnP(self.model_points, image_points, \
                         self.camera_matrix, self.dist_coeffs, \
-                        flags=cv2.cv2.SOLVEPNP_ITERATIVE)
+                        flags=cv2.SOLVEPNP_ITERATIVE)
+            else:
+                (success, face_rot_vec, face_pos_vec) = \
+                        cv2.solvePnP(self.model_points, image_points, \
+                        self.camera_matrix, self.dist_coeffs, \
+                        self.last_rot_vec.copy(), self.last_pos_vec.copy(), \
+                        useExtrinsicGuess=True, flags=cv2.SOLVEPNP_ITERATIVE)
+
+            if not success:
+                self.last_rot_vec = None    #Solve from scratch next time
+                self.last_pos_vec = None
+                continue
+            self.last_rot_vec = face_rot_vec
+            self.last_pos_vec = face_pos_vec
+
+            put_newest(self.detections, (bgr_frame, img_size, face_landmarks, \
+                                         image_points, face_rot_vec, face_pos_vec))
+
+    def main_loop( self ):
+        '''
+        Main loop
+
+        Capture and face detection run in their own threads so the slow
+        face_recognition call doesn't stall the camera; each stage keeps
+        only the newest frames.  This thread sends the results to the
+        viewer and draws them, since imshow must stay on the main thread.
+        '''
+        print("Initializing")
+        # Get a reference to webcam #0 (the default one)
+        self.capture_device = cv2.VideoCapture( self.capture_id )
+        self.capture_device.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_DIMENSIONS[0])
+        self.capture_device.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_DIMENSIONS[1])
+
+        time.sleep(1.0)
+
+        self.stopping.clear()
+        workers = [ threading.Thread(target=self.run_worker, \
+                                     args=(self.capture_loop,), daemon=True),
+                    threading.Thread(target=self.run_worker, \
+                                     args=(self.detect_loop,), daemon=True) ]
+        for worker in workers:
+            worker.start()
+
+        next_tick = time.monotonic()    #When the next update is due
+        while True:
+            #Without both stages there is nothing more to send.
+            if not all(worker.is_alive() for worker in workers):
+                puppetry.log("Face tracking pipeline stopped")
+                break
+
+            try:
+                detection = self.detections.get_nowait()
+            except queue.Empty:
+                detection = None
+
+            if detection is not None:
+                (bgr_frame, img_size, face_landmarks, image_points, \
+                    self.face_rot_vec, self.face_pos_vec) = detection
+
+                #A cold solve can return the same pose wrapped to the other
+                #side of +-pi; averaging across that would flip the head, so
+                #start the average over instead.
+                if self.head_rot_vec is None or \
+                   np.linalg.norm(self.face_rot_vec - self.head_rot_vec) > np.pi:
+                    self.head_rot_vec = self.face_rot_vec.copy()
+                else:
+                    self.head_rot_vec += HEAD_SMOOTHING * \
+                                (self.face_rot_vec - self.head_rot_vec)
 
-            data = self.generate_expression( img_size )
-            puppetry.sendSet({"inverse_kinematics":data})
-            #print("") # uncomment this line when debugging at CLI
+                data = self.generate_expression( img_size )
+                puppetry.sendSet({"inverse_kinematics":data})
+                #print("") # uncomment this line when debugging at CLI
 
-            #Show the frame we captured and draw the detection onto it.
-            self.displayDetected( bgr_frame, face_landmarks, image_points )
+                #Show the frame we captured and draw the detection onto it.
+                self.displayDetected( bgr_frame, face_landmarks, image_points )
 
             # Hit 'q' on the keyboard to quit!
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
 
-            # sleep for eventlet coroutines
-            t1 = time.monotonic()
-            compute_time = t1 - t0
-            nap_duration = max(0.0, UPDATE_PERIOD - compute_time)
-            eventlet.sleep(nap_duration)
+            # sleep for eventlet coroutines until the next update is due.
+            # Pacing against a deadline keeps a slow pass from shifting
+            # every later update; after a long stall, start afresh.
+            next_tick += UPDATE_PERIOD
+            nap_duration = next_tick - time.monotonic()
+            if nap_duration < -UPDATE_PERIOD:
+                next_tick = time.monotonic()
+            eventlet.sleep(max(0.0, nap_duration))
+
+        # Stop the pipeline before letting go of the webcam
+        self.stopping.set()
+        for worker in workers:
+            worker.join(timeout=1.0)
 
         # Release handle to the webcam
         self.capture_device.release()
@@ -1,5 +1,7 @@
 import numpy as np
 
+NUM_FACE_POINTS = 468   #Points in mediapipe's face mesh, as tracked
+
 
 class Model:
     '''Model contains data that pertains to a generic notion of a person
@@ -15,28 +17,24 @@ class Model:
        (-150.0, -150.0, -125.0),    # Left Mouth corner
        ( 150.0, -150.0, -125.0)      # Right mouth corner
     ])
+    face_points.flags.writeable = False     #Shared; safe to use without copying
 
     #Key points on the hands we use for identifying the rotation. wrist+base of fingers
     #NOTE:  There is no 'Heel' in the model. This is created by taking the wrist position
     #and adding Pinky1.x - Index1.x to X.
+    #Indexed by hand_index, then point.  The right hand mirrors the left in X.
     #L/R U/D Z
-    hand_points = {
-        'Left': np.array([
+    hand_index = { 'Left': 0, 'Right': 1 }
+    hand_points = np.array([
             ( 0.38233915, 0.34869850, -0.01617340), #Left Wrist
             ( 0.40562886, 0.34481689, -0.00517549), #Index1Left
             ( 0.40821660, 0.34481689, -0.01682033), #Middle1Left
             ( 0.40692270, 0.34352300, -0.02458357), #Ring1Left
             ( 0.39851254, 0.34481689, -0.03169986), #Pinky1Left
             ( 0.37522283, 0.34869850, -0.01617340) #Left Heel (See NOTE above)
-                        ]),
-        'Right': np.array([
-            ( -0.38233915, 0.34869850, -0.01617340), #Right Wrist
-            ( -0.40562886, 0.34481689, -0.00517549), #Index1Right
-            ( -0.40821660, 0.34481689, -0.01682033), #Middle1Right
-            ( -0.40692270, 0.34352300, -0.02458357), #Ring1Right
-            ( -0.39851254, 0.34481689, -0.03169986), #Pinky1Right
-            ( -0.37522283, 0.34869850, -0.01617340)  #Right Heel (See NOTE above)
-                                ]) }
+                        ])
+    hand_points = np.stack((hand_points, hand_points * (-1.0, 1.0, 1.0)))
+    hand_points.flags.writeable = False
     hand_unit = 0.1108114 #0.0568304 + 0.053981 wrist to index1 + wrist to pinky1
     hand_width = 0.1
 
@@ -57,6 +55,16 @@ class LandmarkIndicies:
     #Landmark IDs which define the plane of the face.
     face_rect = [ 54, 284, 352, 123 ]  #Top left,right; bottom right, left
 
+    #The same face IDs as masks over the NUM_FACE_POINTS face mesh, for selecting
+    #every point of a kind at once.  Orientation takes precedence over rect.
+    face_orientation_mask = np.zeros(NUM_FACE_POINTS, dtype=bool)
+    face_orientation_mask[face_orientation] = True
+    face_orientation_mask.flags.writeable = False
+    face_rect_mask = np.zeros(NUM_FACE_POINTS, dtype=bool)
+    face_rect_mask[face_rect] = True
+    face_rect_mask &= ~face_orientation_mask
+    face_rect_mask.flags.writeable = False
+
     #ID to points ued to orient the face.
     #NOTE:  21 does NOT exist in the model.  We manufacture it.
     hand_orientation = [ 0, 5, 9, 13, 17, 21 ]
@@ -1,5 +1,16 @@
-import matplotlib.pyplot as plot
-from mpl_toolkits.mplot3d import Axes3D
+from math import cos, radians, sin
+
+import cv2
+import numpy as np
+
+WINDOW_NAME = "Camera data"
+PLOT_SIZE = 500         #Width and height of the plot window in pixels
+
+# color = (blue, green, red)
+POSE_COLOR = (0,255,0)
+OUTPUT_COLOR = (0,0,255)
+PERP_COLOR = (255,255,0)
+AXIS_COLOR = (128,128,128)
 
 
 class Plot:
@@ -12,30 +23,28 @@ class Plot:
         self.output_pts = [ [], [], [] ]    #Points being sent to viewer.
         self.perp_pts = [ [], [], [] ]      #Perpendiculars for rotations to viewer.
 
-        plot.ion()      #Turn on interactive mode
-        #The figsize=(5,5) somehow sets the window size
-        self.figure = plot.figure(figsize=(5,5))
-
-        #Draw the axis
-        self.axis = Axes3D(self.figure)
         #Elevation and azimuth are in degrees.
-        #self.axis.view_init(elev=120, azim=90)
-        self.axis.view_init(elev=0, azim=0)
-
-        # setting title and labels
-        self.axis.set_title("Camera data")
-        self.axis.set_xlabel('X-axis')
-        self.axis.set_ylabel('Y-axis')
-        self.axis.set_zlabel('Z-axis')
-
-        # set the range of the graphed area
-        self.axis.set_xlim(-1.0, 1.0)
-        self.axis.set_ylim(-1.0, 1.0)
-        self.axis.set_zlim(-1.0, 1.0)
-
-        self.plotted_pose = None
-        self.plotted_output = None
-        self.plotted_perp = None
+        #self.set_view(elevation=120, azimuth=90)
+        self.set_view(elevation=0, azimuth=0)
+
+        #Drawn into every redraw; shown with the other cv2 windows.
+        self.canvas = np.zeros((PLOT_SIZE, PLOT_SIZE, 3), dtype=np.uint8)
+        try:
+            cv2.namedWindow(WINDOW_NAME)
+        except cv2.error:
+            pass
+
+    def set_view(self, elevation, azimuth):
+        '''Sets the direction the plot is viewed from, in degrees'''
+        elev = radians(elevation)
+        azim = radians(azimuth)
+
+        #Rows are the screen right and screen up directions in plot space.
+        #The -1 to 1 cube fills most of the window.
+        scale = 0.4 * PLOT_SIZE
+        self.projection = scale * np.array( \
+                    [[ -sin(azim), cos(azim), 0.0 ], \
+                     [ -sin(elev) * cos(azim), -sin(elev) * sin(azim), cos(elev) ]])
 
     def set_frame_number(self, frame_number):
         self.frame_number = frame_number
@@ -72,48 +81,63 @@ class Plot:
         if (self.frame_number % self.interval != 0):
             return
 
-        for landmark in landmarks.landmark:
-            #Don't draw landmarks we can't really see.
-            if landmark.visibility < 0.5:
-                continue
+        points = np.array([ (landmark.x, landmark.y, landmark.z, landmark.visibility) \
+                            for landmark in landmarks.landmark ], dtype=np.float32)
+        if len(points) == 0:
+            return
 
-            #NOTE:  Axis are deliberately swapped due to viewport
-            # rotation's poor behavior.
-            self.pose_pts[0].append(landmark.x)
-            self.pose_pts[1].append(landmark.y*-1.0)
-            self.pose_pts[2].append(landmark.z)
+        #Don't draw landmarks we can't really see.
+        points = points[points[:, 3] >= 0.5]
+
+        #NOTE:  Axis are deliberately swapped due to viewport
+        # rotation's poor behavior.
+        self.pose_pts[0].extend(points[:, 0].tolist())
+        self.pose_pts[1].extend((points[:, 1] * -1.0).tolist())
+        self.pose_pts[2].extend(points[:, 2].tolist())
 
     def stop(self):
         '''Releases the plot'''
-        plot.cla()
+        try:
+            cv2.destroyWindow(WINDOW_NAME)
+        except cv2.error:
+            pass
+
+    def to_pixels(self, points):
+        '''Projects (3,N) plot space points to (N,2) window pixels'''
+        pixels = self.projection @ np.asarray(points, dtype=float)
+        pixels[1] *= -1.0       #Window y runs down.
+        pixels += PLOT_SIZE / 2
+        return pixels.T.astype(int)
+
+    def draw_points(self, points, color):
+        '''Draws the (3,N) plot space points as dots'''
+        if len(points[0]) == 0:
+            return
+        for x, y in self.to_pixels(points):
+            cv2.circle(self.canvas, (int(x), int(y)), 3, color, -1)
 
     def draw(self):
         if (self.frame_number % self.interval != 0):
             return
 
-        if self.plotted_pose is not None:
-            self.plotted_pose.remove()
-        self.plotted_pose = self.axis.scatter( \
-                                self.pose_pts[0], \
-                                self.pose_pts[1], \
-                                self.pose_pts[2], \
-                                color='green')
-
-        if self.plotted_output is not None:
-            self.plotted_output.remove()
-        self.plotted_output = self.axis.scatter( \
-                                self.output_pts[0], \
-                                self.output_pts[1], \
-                                self.output_pts[2], \
-                                color='red')
-
-        if self.plotted_perp is not None:
-            self.plotted_perp.remove()
-        self.plotted_perp = self.axis.scatter( \
-                                self.perp_pts[0], \
-                                self.perp_pts[1], \
-                                self.perp_pts[2], \
-                                color='cyan')
-        plot.draw()
-        plot.pause(0.01)
+        self.canvas[:] = 0
+
+        #Draw the axis from the origin, labelled at the positive end.
+        axes = self.to_pixels(np.hstack((np.zeros((3,1)), np.eye(3))))
+        origin = (int(axes[0][0]), int(axes[0][1]))
+        for end, label in zip(axes[1:], ('X', 'Y', 'Z')):
+            end = (int(end[0]), int(end[1]))
+            cv2.line(self.canvas, origin, end, AXIS_COLOR, 1)
+            cv2.putText(self.canvas, label, end, cv2.FONT_HERSHEY_SIMPLEX, \
+                        0.5, AXIS_COLOR, 1)
+
+        self.draw_points(self.pose_pts, POSE_COLOR)
+        self.draw_points(self.output_pts, OUTPUT_COLOR)
+        self.draw_points(self.perp_pts, PERP_COLOR)
+
+        #The tracking loop's cv2.waitKey() services this window too.
+        try:
+            cv2.imshow(WINDOW_NAME, self.canvas)
+        except cv2.error:
+            pass
         self.flush()
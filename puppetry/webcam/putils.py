@@ -2,6 +2,7 @@
 utility functions
 """
 
+from itertools import chain, islice
 from math import atan2, sqrt
 
 import cv2
@@ -136,15 +137,25 @@ def conjugate_quat(quat):
     return result
 
 def rotate_vector(vec, q1):
-    '''Rotate a vector by a quaternion.'''
-    q2 = glm.quat()
-    q2.w = 0.0
-    q2.x = vec[0]
-    q2.y = vec[1]
-    q2.z = vec[2]
-
-    q3 =  (q1 * q2) * conjugate_quat(q1)
-    return [q3.x, q3.y, q3.z]
+    '''Rotate a vector by a unit quaternion.
+       Equivalent to q1 * vec * conjugate(q1), expanded as
+       t = 2 * (q x v),  v' = v + w*t + (q x t)
+       so no intermediate quaternions are built.'''
+    w = q1.w
+    qx = q1.x
+    qy = q1.y
+    qz = q1.z
+    vx = vec[0]
+    vy = vec[1]
+    vz = vec[2]
+
+    tx = 2.0 * (qy * vz - qz * vy)
+    ty = 2.0 * (qz * vx - qx * vz)
+    tz = 2.0 * (qx * vy - qy * vx)
+
+    return [ vx + w * tx + (qy * tz - qz * ty),
+             vy + w * ty + (qz * tx - qx * tz),
+             vz + w * tz + (qx * ty - qy * tx) ]
 
 def rotate_point(origin, point, rot):
     '''Rotate point about origin by rotation'''
@@ -168,6 +179,13 @@ def get_landmark_vector3(landmarks, index):
             landmarks.landmark[index].y, \
             landmarks.landmark[index].z]
 
+def landmarks_to_ndarray(landmarks, count=None):
+    '''Copies the x,y,z of the landmarks (or only the first count of them)
+       into an (N,3) ndarray, so the protobuf is only read once.'''
+    coords = chain.from_iterable( (landmark.x, landmark.y, landmark.z) \
+                                  for landmark in islice(landmarks.landmark, count) )
+    return np.fromiter(coords, dtype=np.float64).reshape(-1, 3)
+
 def get_landmark_direction(v1, v2):
     '''Passed in two vector3, returns a directional vector from v1 to v2
        NOTE: Does not normalize!'''
@@ -188,29 +206,17 @@ def distance_3d(v1, v2):
 def get_dimensions(points, indicies):
     '''Given a set of points, returns bounding cube, min, max, and center'''
 
-    xs = []
-    ys = []
-    zs = []
-    for index in indicies:
-        xs.append(points[index][0])
-        ys.append(points[index][1])
-        zs.append(points[index][2])
-
-    minx = min(xs)
-    miny = min(ys)
-    minz = min(zs)
-    maxx = max(xs)
-    maxy = max(ys)
-    maxz = max(zs)
-
-    result={ 'min' : [minx,miny,minz],
-             'max' : [maxx,maxy,maxz],
-             'height' : maxx-minx,
-             'width'  : maxy-miny,
-             'depth'  : maxz-minz }
-    result['center'] = [ minx + result['width']/2.0, \
-                         miny + result['height']/2.0, \
-                         minz + result['depth']/2.0 ]
+    subset = np.asarray(points)[list(indicies)]
+    low = subset.min(axis=0)
+    high = subset.max(axis=0)
+    size = high - low
+
+    result={ 'min' : low.tolist(),
+             'max' : high.tolist(),
+             'width'  : float(size[0]),
+             'height' : float(size[1]),
+             'depth'  : float(size[2]),
+             'center' : ((low + high) / 2.0).tolist() }
 
     return result
 
@@ -277,94 +283,50 @@ def get_weighted_average_vec( vec, avg_vec, wgt ):
 def get_average( dataset ):
     '''Given a set of 2d points, generate a simple average'''
 
-    divisor = len(dataset)
-    total = None
-
-    for data in dataset:
-        if total is None:
-            total = np.array( data )
-        else:
-            total = np.add( total, data )
-    return np.divide( total, float(divisor) )
+    return np.mean( np.asarray(dataset, dtype=np.float64), axis=0 )
 
 def clear_average(dest):
-    '''Fills with NaN'''
+    '''Fills the x,y,z of every point in the dest ndarray with NaN'''
 
-    for d in dest:
-        d[0] =  np.double('nan')
-        d[1] =  np.double('nan')
-        d[2] =  np.double('nan')
+    dest[:, :3] = np.nan
 
 def scale_z(factor, dest):
-    '''Scales the Z aspect of all points in dest by factor'''
-    for d in dest:
-        d[2] = d[2] * factor
+    '''Scales the Z aspect of all points in the dest ndarray by factor'''
+    dest[:, 2] *= factor
 
 def average_landmarks(landmarks, dest, dlen, weight):
     '''Get values from the landmarks
-       and apply an exponentially weighted average'''
-
-    #dlen = len(dest)
-    index=0
-    while (index < dlen):
-        if np.isnan(dest[index][0]):
-            dest[index] = [ landmarks.landmark[index].x, \
-                            landmarks.landmark[index].y, \
-                            landmarks.landmark[index].z ]
-        else:
-            dest[index] = get_weighted_average_vec(
-                          [ landmarks.landmark[index].x, \
-                            landmarks.landmark[index].y, \
-                            landmarks.landmark[index].z ], \
-                            dest[index], \
-                            weight)
-        index = index + 1
+       and apply an exponentially weighted average
+       dest is an ndarray of at least dlen points.'''
+
+    new = landmarks_to_ndarray(landmarks, dlen)
+
+    #Points cleared to NaN start over from the new value.
+    unset = np.isnan(dest[:dlen, 0])
+    dest[:dlen] = get_weighted_average(new, dest[:dlen], weight)
+    dest[:dlen][unset] = new[unset]
 
 def average_sequential_landmarks(start, end, landmarks):
     '''start and end are the sequential indicies to be averaged into a centeral point.
        points is the dataset the indicies are found in.
        retuns [ x, y, z ] averaged.'''
 
-    num = (end - start) + 1
-    avg = [ 0.0, 0.0, 0.0 ]
-    for p in range(start,end+1):
-        avg[0] = avg[0] + landmarks.landmark[p].x
-        avg[1] = avg[1] + landmarks.landmark[p].y
-        avg[2] = avg[2] + landmarks.landmark[p].z
-    for a in range (0,3):
-        avg[a] = avg[a] / float(num)
-
-    return avg
+    points = landmarks_to_ndarray(landmarks, end + 1)
+    return points[start:end+1].mean(axis=0).tolist()
 
 def average_sequential_points(start, end, points):
     '''start and end are the sequential indicies to be averaged into a centeral point.
        points is the dataset the indicies are found in.
        retuns [ x, y, z ] averaged.'''
 
-    num = (end - start) + 1
-    avg = [ 0.0, 0.0, 0.0 ]
-    for p in range(start,end+1):
-        for a in range (0,3):
-            avg[a] = avg[a] + points[p][a]
-    for a in range (0,3):
-        avg[a] = avg[a] / float(num)
-
-    return avg
+    return np.asarray(points[start:end+1]).mean(axis=0).tolist()
 
 def average_subset_points(indicies, points):
     '''indicies are the indices to a subset of points in the
        larger set of points to be averaged into a centeral point.
        retuns [ x, y, z ] averaged.'''
 
-    num = len(indicies)
-    avg = [ 0.0, 0.0, 0.0 ]
-    for p in range(indicies):
-        for a in range (0,3):
-            avg[a] = avg[a] + points[p][a]
-    for a in range (0,3):
-        avg[a] = avg[a] / float(num)
-
-    return avg
+    return np.asarray(points)[list(indicies)].mean(axis=0).tolist()
 
 def distance_2d(a,b):
     '''Given two points, find the 2D dist between'''
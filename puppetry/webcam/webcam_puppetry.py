@@ -59,6 +59,7 @@ import mediapipe as mp
 import numpy as np
 from camera import Camera
 from display import Display
+from pconsts import NUM_FACE_POINTS
 from pconsts import LandmarkIndicies as LI
 from pconsts import Model as M
 from plot import Plot
@@ -78,7 +79,6 @@ UPDATE_PERIOD = 0.1     # time between puppetry updates
 
 WINDOW_NAME = "Image"
 
-NUM_FACE_POINTS = 468
 NUM_HAND_POINTS =  21
 NUM_POSE_POINTS =  32
 
@@ -146,6 +146,7 @@ class Expression:
         # to show the capture image, overlay of points, etc.
         #self.display.display = False           #Completely disable the display window
         #self.display.dimensions = [320, 200]   #Specify X,Y dimensions for output or None for camera resolution.
+        #self.display.interpolation = cv2.INTER_NEAREST #Fastest resize to dimensions; None picks by scale.
         #self.display.display_video = False     #Set True for captured video in display window.
         #self.display.display_face_pts = False  #Set True for overlay of face landmarks.
         #self.display.display_fps   = False     #Set True for estimated capture frames per second.
@@ -296,7 +297,8 @@ class Expression:
         self.rotate_head(output)
 
         #Draw on output image
-        num_points = self.display.draw_all_points(self.avg_face_pts, LI.face_orientation, LI.face_rect)
+        num_points = self.display.draw_all_points(self.avg_face_pts, \
+                            LI.face_orientation_mask, LI.face_rect_mask)
         if num_points > 0:
             self.display.draw_perpendicular( \
                             self.image_points[0], \
@@ -526,7 +528,7 @@ class Expression:
 
         puppetry.sendGet('skeleton')    #Request skeleton
         retries = 3
-        end_time = time.time() + 2.0
+        end_time = time.monotonic() + 2.0
 
         while puppetry.isRunning() and retries > 0:
             if puppetry.get_skeleton_data('scale') is not None:
@@ -534,7 +536,7 @@ class Expression:
 
             eventlet.sleep(0.1) #Sleep 1/10th of a second
 
-            cur_time = time.time()
+            cur_time = time.monotonic()
             if cur_time > end_time:
                 retries = retries - 1
                 end_time = cur_time + 3.0
@@ -569,7 +571,7 @@ class Expression:
                 self.camera.configure_camera()         # Fire it up
 
             success = True
-            track_start_time = time.time()
+            track_start_time = time.monotonic()
             if new_frame:
                 frame_start_time = track_start_time
                 new_frame = False
@@ -654,7 +656,7 @@ class Expression:
                 self.handle_hand('Left', data)
                 self.handle_hand('Right', data)
 
-            cur_time = time.time()
+            cur_time = time.monotonic()
             track_compute_time = cur_time - track_start_time
             frame_compute_time = cur_time - frame_start_time
 
@@ -685,7 +687,7 @@ class Expression:
                     self.display.do_display(track_start_time)
                     show_erase = False
 
-                cur_time = time.time()
+                cur_time = time.monotonic()
                 frame_compute_time = cur_time - frame_start_time
                 nap_duration = max(0.0, UPDATE_PERIOD - frame_compute_time)
                 eventlet.sleep(nap_duration)